@@ -0,0 +1,451 @@
+"""
+Content Search Helpers
+
+This module implements the content side of the search_files tool: compiling
+client-supplied regular expressions and scanning files for lines that match
+them.
+"""
+
+import codecs
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+# Regex node types that wrap a single subpattern (some only exist on newer Pythons)
+_REPEAT_OPS = {
+    op for op in (
+        sre_parse.MAX_REPEAT,
+        sre_parse.MIN_REPEAT,
+        getattr(sre_parse, "POSSESSIVE_REPEAT", None),
+    ) if op is not None
+}
+_ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
+
+# Reason: unsupported patterns fall back to re, so RE2's own error logging is just noise
+_RE2_OPTIONS = None
+if re2 is not None and hasattr(re2, "Options"):
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False
+
+# Worker pool for content scans.
+# Reason: scans mostly wait on reads and page faults, which release the GIL, so
+# more threads than cores keep the disk queue full; capped like ThreadPoolExecutor's default.
+executor = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="fs-read"
+)
+
+# A carriage return not followed by a newline, which ends a line in text mode
+_LONE_CR = re.compile(rb"\r(?!\n)")
+
+# Bytes decoded at a time when checking that a searched file is valid UTF-8
+_DECODE_CHUNK = 1024 * 1024
+
+def _compile_re2(pattern: Union[str, bytes]) -> Optional[Any]:
+    """
+    Compile a pattern with RE2 if it is installed.
+    
+    RE2 matches in linear time, so client-supplied patterns cannot trigger
+    catastrophic backtracking. It does not support every Python regex feature,
+    and patterns it would read differently from re are not handed to it.
+    
+    Args:
+        pattern: The regular expression to compile
+        
+    Returns:
+        The compiled RE2 pattern, or None if RE2 is unavailable or the pattern
+        is rejected by RE2 or _is_re2_compatible
+    """
+    if re2 is None or not _is_re2_compatible(pattern):
+        return None
+    try:
+        if _RE2_OPTIONS is not None:
+            return re2.compile(pattern, _RE2_OPTIONS)
+        return re2.compile(pattern)
+    except Exception as e:
+        # Reason: RE2 rejects backreferences, lookarounds and similar constructs
+        logger.debug(f"RE2 cannot compile {pattern!r}, using re instead: {e}")
+        return None
+
+def _is_re2_compatible(pattern: Union[str, bytes]) -> bool:
+    """
+    Check whether RE2 would give a valid Python regex the same meaning as re.
+    
+    RE2 accepts some Python patterns but reads them differently: 'a{,3}' is a
+    literal '{,3}' rather than a repeat, '[[:alpha:]]' is a POSIX class rather
+    than a set containing '[', and '\\d', '\\s', '\\w' and '\\b' use different
+    character tables than re's Unicode ones.
+    
+    Args:
+        pattern: The regular expression to check
+        
+    Returns:
+        True if the pattern parses with re and avoids constructs RE2 reads differently
+    """
+    text = pattern.decode('utf-8') if isinstance(pattern, bytes) else pattern
+    if "{," in text or "[:" in text:
+        return False
+    try:
+        parsed = sre_parse.parse(text)
+    except re.error:
+        return False
+    return not _uses_categories(parsed)
+
+def _uses_categories(items: Any) -> bool:
+    """
+    Check whether a parsed regex uses character categories or word boundaries.
+    
+    Args:
+        items: A parsed (sub)pattern from sre_parse
+        
+    Returns:
+        True if '\\d', '\\s', '\\w', their negations, '\\b' or '\\B' appear anywhere
+    """
+    for op, av in items:
+        if op == sre_parse.IN:
+            if any(set_op == sre_parse.CATEGORY for set_op, _ in av):
+                return True
+        elif op == sre_parse.AT:
+            if av in (sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY):
+                return True
+        elif op in _REPEAT_OPS:
+            if _uses_categories(av[2]):
+                return True
+        elif op == sre_parse.SUBPATTERN:
+            if _uses_categories(av[3]):
+                return True
+        elif op == sre_parse.BRANCH:
+            if any(_uses_categories(branch) for branch in av[1]):
+                return True
+        elif op == _ATOMIC_GROUP:
+            if _uses_categories(av):
+                return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _uses_categories(av[1]):
+                return True
+        elif op == sre_parse.GROUPREF_EXISTS:
+            if _uses_categories(av[1]) or (av[2] is not None and _uses_categories(av[2])):
+                return True
+    return False
+
+@lru_cache(maxsize=128)
+def compile_regex(pattern: str) -> "re.Pattern[str]":
+    """
+    Compile a regex pattern, reusing the compiled object across tool calls.
+    
+    RE2 is used when installed and able to compile the pattern, otherwise re.
+    
+    Args:
+        pattern: The regular expression to compile
+        
+    Returns:
+        The compiled pattern
+        
+    Raises:
+        ValueError: If the pattern is not a valid regular expression
+    """
+    compiled = _compile_re2(pattern)
+    if compiled is not None:
+        return compiled
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid content regex '{pattern}': {e}")
+
+def extract_required_literal(pattern: str) -> Optional[str]:
+    """
+    Find a literal substring that every match of a regex must contain.
+    
+    Only top-level runs of plain characters are considered; anything else
+    (character classes, alternations, optional repeats, groups) ends the run.
+    
+    Args:
+        pattern: The regular expression to analyse
+        
+    Returns:
+        The longest required literal, or None if none can be determined safely
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    
+    # Reason: with case-insensitive matching a plain substring test would miss matches
+    if parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE:
+        return None
+    
+    best = ""
+    run = []
+    for op, av in parsed:
+        if op == sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    if len(run) > len(best):
+        best = "".join(run)
+    
+    return best or None
+
+def _is_bytes_safe(items: Any) -> bool:
+    """
+    Check whether a parsed regex matches the same text as bytes and as str.
+    
+    Args:
+        items: A parsed (sub)pattern from sre_parse
+        
+    Returns:
+        True if only ASCII literals and sets, groups, alternations, repeats,
+        backreferences and '^' are used
+    """
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            if av > 0x7F:
+                return False
+        elif op == sre_parse.IN:
+            for set_op, set_av in av:
+                if set_op == sre_parse.LITERAL and set_av <= 0x7F:
+                    continue
+                if set_op == sre_parse.RANGE and set_av[1] <= 0x7F:
+                    continue
+                return False
+        elif op in _REPEAT_OPS:
+            if not _is_bytes_safe(av[2]):
+                return False
+        elif op == sre_parse.SUBPATTERN:
+            _group, add_flags, _del_flags, sub = av
+            if add_flags & sre_parse.SRE_FLAG_IGNORECASE or not _is_bytes_safe(sub):
+                return False
+        elif op == sre_parse.BRANCH:
+            if not all(_is_bytes_safe(branch) for branch in av[1]):
+                return False
+        elif op == _ATOMIC_GROUP:
+            if not _is_bytes_safe(av):
+                return False
+        elif op == sre_parse.AT:
+            if av != sre_parse.AT_BEGINNING:
+                return False
+        elif op != sre_parse.GROUPREF:
+            return False
+    return True
+
+@lru_cache(maxsize=128)
+def compile_bytes_regex(pattern: str) -> Optional["re.Pattern[bytes]"]:
+    """
+    Compile a content regex for scanning raw UTF-8 file data.
+    
+    Only patterns that match exactly the same lines as bytes as they do as
+    text are compiled. Anything whose meaning depends on decoding or on line
+    endings (such as '.', '\\w', negated sets, case folding, '$' or lookarounds)
+    is rejected.
+    
+    Args:
+        pattern: The regular expression to compile
+        
+    Returns:
+        The compiled bytes pattern, or None if the pattern is not safe to use on bytes
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE or not _is_bytes_safe(parsed):
+        return None
+    
+    # Reason: lines are scanned within the whole file, so '^' must match after each newline
+    pattern_b = pattern.encode('utf-8')
+    compiled = _compile_re2(b"(?m)" + pattern_b)
+    if compiled is not None:
+        return compiled
+    try:
+        return re.compile(pattern_b, re.MULTILINE)
+    except re.error:
+        return None
+
+def search_content(
+    file_path: str,
+    content_re: "re.Pattern[str]",
+    lit: Optional[str],
+    content_re_b: Optional["re.Pattern[bytes]"] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Find the lines of a file matching a regex.
+    
+    When a required literal or a bytes regex is available the file is read
+    whole and scanned as raw bytes, and only candidate lines are
+    decoded and checked against the regex, so files without a match are never
+    decoded. Otherwise the file is streamed line by line. Both ways report the
+    same lines, and files that are not valid UTF-8 are skipped either way.
+    
+    Args:
+        file_path: The file to search
+        content_re: The compiled content regex
+        lit: A literal every match must contain, used as a cheap prefilter
+        content_re_b: The bytes form of the content regex, if safe to use
+        
+    Returns:
+        A list of matching lines, or None if the file could not be read
+    """
+    try:
+        if lit is None and content_re_b is None:
+            return _search_lines(file_path, content_re)
+        return _search_bytes(file_path, content_re, lit.encode('utf-8') if lit else None, content_re_b)
+    except Exception as e:
+        logger.warning(f"Could not search content in {file_path}: {e}")
+        return None
+
+def _search_lines(file_path: str, content_re: "re.Pattern[str]") -> List[Dict[str, Any]]:
+    """
+    Search a file for matching lines by decoding it line by line.
+    
+    Args:
+        file_path: The file to search
+        content_re: The compiled content regex
+        
+    Returns:
+        A list of matching lines
+    """
+    matches = []
+    # Reason: iterate the file object so large files are never held in memory
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if content_re.search(line):
+                matches.append({
+                    "line_number": i,
+                    "content": line.strip()
+                })
+    return matches
+
+def _newline_offsets(data: bytes) -> "np.ndarray":
+    """
+    Find the offset of every newline in a file's contents.
+    
+    Args:
+        data: The file's bytes
+        
+    Returns:
+        A sorted array of newline byte offsets
+    """
+    return np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 0x0A)
+
+def _search_bytes(
+    file_path: str,
+    content_re: "re.Pattern[str]",
+    lit_b: Optional[bytes],
+    content_re_b: Optional["re.Pattern[bytes]"]
+) -> List[Dict[str, Any]]:
+    """
+    Search a file's raw bytes for matching lines without decoding all of it.
+    
+    Candidate positions come from the bytes regex, or else from occurrences of
+    the required literal. Each candidate's line is decoded and confirmed with
+    the text regex, then scanning resumes on the following line.
+    
+    Args:
+        file_path: The file to search
+        content_re: The compiled content regex
+        lit_b: The UTF-8 encoded required literal, if any
+        content_re_b: The bytes form of the content regex, if safe to use
+        
+    Returns:
+        A list of matching lines
+    """
+    matches = []
+    # Reason: a plain read rather than an mmap, since a file truncated by another
+    # process while mapped raises SIGBUS, which Python cannot catch
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    
+    # Skip files that cannot possibly match
+    if lit_b and data.find(lit_b) < 0:
+        return matches
+    
+    # Reason: text mode also ends lines at a lone '\r' (old Mac line endings)
+    # while the byte scan only splits on '\n', so read such files as text
+    if data.find(b'\r') >= 0 and _LONE_CR.search(data):
+        return _search_lines(file_path, content_re)
+    
+    end = len(data)
+    pos = 0
+    line_number = 1
+    counted = 0
+    newlines = None
+    while pos < end:
+        if content_re_b is not None:
+            m = content_re_b.search(data, pos)
+            if m is None:
+                break
+            start = m.start()
+        else:
+            start = data.find(lit_b, pos)
+            if start < 0:
+                break
+        
+        if np is not None:
+            # Reason: one vectorised pass finds every newline, after which
+            # each candidate's line is a binary search away
+            if newlines is None:
+                newlines = _newline_offsets(data)
+            index = int(newlines.searchsorted(start))
+            line_number = index + 1
+            line_start = int(newlines[index - 1]) + 1 if index else 0
+            line_end = int(newlines[index]) if index < len(newlines) else end
+        else:
+            newline = data.rfind(b'\n', pos, start)
+            line_start = pos if newline < 0 else newline + 1
+            line_end = data.find(b'\n', start)
+            if line_end < 0:
+                line_end = end
+            
+            line_number += data.count(b'\n', counted, line_start)
+            counted = line_start
+        
+        line = data[line_start:line_end].decode('utf-8').rstrip('\r')
+        if content_re.search(line):
+            matches.append({
+                "line_number": line_number,
+                "content": line.strip()
+            })
+        pos = line_end + 1
+    
+    # Reason: _search_lines skips files that do not decode, so do the same
+    # even though only the candidate lines have been decoded so far
+    if matches:
+        _check_utf8(data)
+    return matches
+
+def _check_utf8(data: bytes) -> None:
+    """
+    Check that a file's contents are valid UTF-8, decoding them in chunks.
+    
+    Args:
+        data: The file's bytes
+        
+    Raises:
+        UnicodeDecodeError: If the data is not valid UTF-8
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for offset in range(0, len(data), _DECODE_CHUNK):
+        decoder.decode(data[offset:offset + _DECODE_CHUNK])
+    decoder.decode(b'', final=True)
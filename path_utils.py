@@ -0,0 +1,38 @@
+"""
+Path Helpers
+
+This module implements the path validation behind every tool: resolving a
+requested path and checking that it stays within the server's base directory.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def resolve_within(path: str, base: str, base_sep: str) -> str:
+    """
+    Resolve and validate a path against a base directory.
+    
+    Args:
+        path: The requested file or directory path
+        base: The resolved base directory access is restricted to
+        base_sep: The base directory with a trailing separator
+        
+    Returns:
+        The resolved absolute path, restricted to the base directory
+    """
+    # Convert to absolute path
+    if not os.path.isabs(path):
+        path = os.path.join(base, path)
+    
+    # Resolve symlinks and '..' components, which also maps an unresolved
+    # spelling of the base directory (e.g. /tmp on macOS) onto the resolved one
+    resolved_path = os.path.realpath(path)
+    
+    # Ensure the path is within the base directory
+    if resolved_path != base and not resolved_path.startswith(base_sep):
+        logger.warning(f"Attempted access outside base directory: {path}")
+        raise ValueError(f"Access denied: Path must be within {base}")
+    
+    return resolved_path
@@ -0,0 +1,388 @@
+"""
+Platform-specific Filesystem Helpers
+
+This module provides drop-in replacements for standard library filesystem calls
+that use faster platform APIs where available, falling back to the standard
+library everywhere else.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import platform
+import stat
+import struct
+import sys
+from typing import Callable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# getattrlistbulk(2) constants from <sys/attr.h> and <sys/vnode.h>
+ATTR_BIT_MAP_COUNT = 5
+ATTR_CMN_NAME = 0x00000001
+ATTR_CMN_OBJTYPE = 0x00000008
+ATTR_CMN_MODTIME = 0x00000400
+ATTR_CMN_ERROR = 0x20000000
+ATTR_CMN_RETURNED_ATTRS = 0x80000000
+ATTR_FILE_TOTALSIZE = 0x00000002
+
+# statx(2) constants from <linux/fcntl.h> and <linux/stat.h>
+AT_STATX_DONT_SYNC = 0x4000
+STATX_TYPE = 0x00000001
+STATX_SIZE = 0x00000200
+
+# statx syscall numbers, used when the C library has no statx() wrapper
+_SYS_STATX = {
+    "x86_64": 332,
+    "aarch64": 291,
+    "riscv64": 291,
+    "i386": 383,
+    "i686": 383,
+    "armv7l": 397,
+}
+
+# Reason: struct statx is 256 bytes; only mask, mode and size are read from it
+_STATX_BUFSIZE = 256
+
+_READ_CHUNK = 64 * 1024
+
+# Map vnode types to stat mode bits
+_VTYPE_MODES = {
+    1: stat.S_IFREG,   # VREG
+    2: stat.S_IFDIR,   # VDIR
+    3: stat.S_IFBLK,   # VBLK
+    4: stat.S_IFCHR,   # VCHR
+    5: stat.S_IFLNK,   # VLNK
+    6: stat.S_IFSOCK,  # VSOCK
+    7: stat.S_IFIFO,   # VFIFO
+}
+
+# Reason: one 64KB buffer holds several hundred entries, so a directory of
+# thousands of files is read in a handful of syscalls
+_BULK_BUFSIZE = 64 * 1024
+
+class _AttrList(ctypes.Structure):
+    """The struct attrlist passed to getattrlistbulk(2)."""
+    _fields_ = [
+        ("bitmapcount", ctypes.c_ushort),
+        ("reserved", ctypes.c_uint16),
+        ("commonattr", ctypes.c_uint32),
+        ("volattr", ctypes.c_uint32),
+        ("dirattr", ctypes.c_uint32),
+        ("fileattr", ctypes.c_uint32),
+        ("forkattr", ctypes.c_uint32),
+    ]
+
+_ATTRLIST = _AttrList(
+    bitmapcount=ATTR_BIT_MAP_COUNT,
+    commonattr=(
+        ATTR_CMN_RETURNED_ATTRS | ATTR_CMN_ERROR | ATTR_CMN_NAME
+        | ATTR_CMN_OBJTYPE | ATTR_CMN_MODTIME
+    ),
+    fileattr=ATTR_FILE_TOTALSIZE,
+)
+
+def _load_getattrlistbulk() -> Optional[Callable[..., int]]:
+    """
+    Look up getattrlistbulk(2) in the C library.
+    
+    Returns:
+        The ctypes function, or None if not running on macOS or unavailable
+    """
+    if sys.platform != "darwin":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        func = libc.getattrlistbulk
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint64]
+    func.restype = ctypes.c_int
+    return func
+
+_getattrlistbulk = _load_getattrlistbulk()
+
+def _load_statx() -> Optional[Callable[..., int]]:
+    """
+    Look up statx(2) in the C library, falling back to the raw syscall.
+    
+    Returns:
+        A function taking (dirfd, pathname, flags, mask, statxbuf), or None if
+        not running on Linux or unavailable
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+    
+    # glibc 2.28+ exports a statx() wrapper
+    func = getattr(libc, "statx", None)
+    if func is not None:
+        func.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.c_void_p]
+        func.restype = ctypes.c_int
+        return func
+    
+    sys_statx = _SYS_STATX.get(platform.machine())
+    if sys_statx is None:
+        return None
+    syscall = libc.syscall
+    syscall.restype = ctypes.c_long
+    return lambda dirfd, path, flags, mask, buf: syscall(
+        ctypes.c_long(sys_statx), ctypes.c_int(dirfd), ctypes.c_char_p(path),
+        ctypes.c_int(flags), ctypes.c_uint(mask), buf,
+    )
+
+_statx = _load_statx()
+
+class BulkDirEntry:
+    """
+    A directory entry read with getattrlistbulk(2), mirroring os.DirEntry.
+    """
+    __slots__ = ("name", "path", "_mode", "_size", "_mtime")
+    
+    def __init__(self, dir_path: str, name: str, mode: int, size: int, mtime: int):
+        self.name = name
+        self.path = os.path.join(dir_path, name)
+        self._mode = mode
+        self._size = size
+        self._mtime = mtime
+    
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        if follow_symlinks and stat.S_ISLNK(self._mode):
+            return os.path.isdir(self.path)
+        return stat.S_ISDIR(self._mode)
+    
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        if follow_symlinks and stat.S_ISLNK(self._mode):
+            return os.path.isfile(self.path)
+        return stat.S_ISREG(self._mode)
+    
+    def is_symlink(self) -> bool:
+        return stat.S_ISLNK(self._mode)
+    
+    def stat(self, *, follow_symlinks: bool = True) -> os.stat_result:
+        if follow_symlinks and stat.S_ISLNK(self._mode):
+            return os.stat(self.path)
+        # Reason: only the fields requested from the kernel are filled in
+        return os.stat_result((self._mode, 0, 0, 0, 0, 0, self._size, 0, self._mtime, 0))
+    
+    def __repr__(self) -> str:
+        return f"<BulkDirEntry {self.name!r}>"
+
+def _parse_entries(buf: Union[bytes, ctypes.Array], count: int, dir_path: str) -> List[BulkDirEntry]:
+    """
+    Decode the packed records written by getattrlistbulk(2).
+    
+    Each record is laid out as: length, returned attribute set, error, then the
+    requested common attributes in bit order, followed by the file attributes.
+    
+    Args:
+        buf: The buffer filled by the syscall
+        count: The number of records in the buffer
+        dir_path: The directory being listed
+    
+    Returns:
+        The decoded directory entries, skipping any the kernel reported errors for
+    """
+    entries = []
+    view = memoryview(buf)
+    pos = 0
+    for _ in range(count):
+        length, common, _vol, _dir, fileattr, _fork = struct.unpack_from("=6I", view, pos)
+        cursor = pos + 24
+        
+        error = 0
+        if common & ATTR_CMN_ERROR:
+            (error,) = struct.unpack_from("=I", view, cursor)
+            cursor += 4
+        
+        name = None
+        if common & ATTR_CMN_NAME:
+            name_offset, name_length = struct.unpack_from("=iI", view, cursor)
+            start = cursor + name_offset
+            # Reason: the reported length includes the trailing NUL
+            name = os.fsdecode(bytes(view[start:start + name_length - 1]))
+            cursor += 8
+        
+        mode = 0
+        if common & ATTR_CMN_OBJTYPE:
+            (obj_type,) = struct.unpack_from("=I", view, cursor)
+            mode = _VTYPE_MODES.get(obj_type, 0)
+            cursor += 4
+        
+        mtime = 0
+        if common & ATTR_CMN_MODTIME:
+            # Reason: struct timespec is two 64-bit fields on 64-bit macOS
+            mtime, _nsec = struct.unpack_from("=qq", view, cursor)
+            cursor += 16
+        
+        size = 0
+        if fileattr & ATTR_FILE_TOTALSIZE:
+            (size,) = struct.unpack_from("=q", view, cursor)
+        
+        if error == 0 and name is not None:
+            entries.append(BulkDirEntry(dir_path, name, mode, size, mtime))
+        pos += length
+    return entries
+
+class _BulkScandirIterator:
+    """
+    Iterate over a directory with getattrlistbulk(2), mirroring os.scandir().
+    
+    The first batch is read on construction so that unsupported filesystems
+    fail early and the caller can fall back to os.scandir().
+    """
+    
+    def __init__(self, path: str):
+        self._path = os.fspath(path)
+        self._buf = ctypes.create_string_buffer(_BULK_BUFSIZE)
+        self._fd = -1
+        self._fd = os.open(self._path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            self._batch = self._read_batch()
+        except OSError:
+            self.close()
+            raise
+    
+    def _read_batch(self) -> Optional[List[BulkDirEntry]]:
+        if self._fd < 0:
+            return None
+        count = _getattrlistbulk(self._fd, ctypes.byref(_ATTRLIST), self._buf, _BULK_BUFSIZE, 0)
+        if count < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), self._path)
+        if count == 0:
+            return None
+        return _parse_entries(self._buf, count, self._path)
+    
+    def __iter__(self) -> Iterator[BulkDirEntry]:
+        while self._batch is not None:
+            batch, self._batch = self._batch, None
+            yield from batch
+            self._batch = self._read_batch()
+        self.close()
+    
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+    
+    def __enter__(self) -> "_BulkScandirIterator":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def __del__(self) -> None:
+        self.close()
+
+def fast_stat(dir_fd: int, name: str) -> Optional[os.stat_result]:
+    """
+    Stat a directory entry without forcing the filesystem to revalidate it.
+    
+    Uses statx(2) with AT_STATX_DONT_SYNC, which lets network filesystems such
+    as NFS answer from cached attributes instead of a server round trip. Only
+    the file type and size are requested. Symlinks are followed, like os.stat().
+    
+    Args:
+        dir_fd: A file descriptor for the directory containing the entry
+        name: The entry's name within that directory
+    
+    Returns:
+        A stat result with st_mode and st_size filled in, or None if statx is
+        not available on this system
+    
+    Raises:
+        OSError: If the entry cannot be stat'ed
+    """
+    global _statx
+    if _statx is None:
+        return None
+    
+    buf = ctypes.create_string_buffer(_STATX_BUFSIZE)
+    if _statx(dir_fd, os.fsencode(name), AT_STATX_DONT_SYNC, STATX_TYPE | STATX_SIZE, buf) != 0:
+        err = ctypes.get_errno()
+        if err == errno.ENOSYS:
+            # Reason: kernels older than 4.11 lack statx; stop trying for this process
+            logger.debug("statx is not supported by this kernel")
+            _statx = None
+            return None
+        raise OSError(err, os.strerror(err), name)
+    
+    mode, = struct.unpack_from("=H", buf, 28)
+    size, = struct.unpack_from("=Q", buf, 40)
+    return os.stat_result((mode, 0, 0, 0, 0, 0, size, 0, 0, 0))
+
+def has_fast_stat() -> bool:
+    """
+    Check whether fast_stat() is available on this system.
+    
+    Returns:
+        True if statx(2) can be called
+    """
+    return _statx is not None
+
+def scandir(path: str):
+    """
+    Iterate over a directory like os.scandir(), fetching entry metadata in bulk.
+    
+    On macOS this reads names, types, sizes and modification times for hundreds
+    of entries per getattrlistbulk(2) call instead of one stat call per entry.
+    Elsewhere, or if the bulk call fails, it is simply os.scandir().
+    
+    Args:
+        path: The directory to list
+    
+    Returns:
+        A context manager yielding os.DirEntry-compatible objects
+    """
+    if _getattrlistbulk is not None:
+        try:
+            return _BulkScandirIterator(path)
+        except OSError as e:
+            logger.debug(f"getattrlistbulk failed for {path}, falling back to os.scandir: {e}")
+    return os.scandir(path)
+
+def read_text(path: str, encoding: str = "utf-8") -> str:
+    """
+    Read and decode a whole file with as few system calls as possible.
+    
+    The file is read with a single os.read() sized from fstat(), bypassing
+    Python's buffered text layer. Newlines are translated like open() in text
+    mode would.
+    
+    Args:
+        path: The file to read
+        encoding: The text encoding of the file
+    
+    Returns:
+        The decoded file contents
+    
+    Raises:
+        OSError: If the file cannot be read
+        UnicodeDecodeError: If the file is not valid in the given encoding
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        
+        chunks = [os.read(fd, size)] if size else []
+        # Reason: keep reading in case the file grew or reports no size (e.g. procfs)
+        while True:
+            chunk = os.read(fd, _READ_CHUNK)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        text = b"".join(chunks).decode(encoding)
+    finally:
+        os.close(fd)
+    
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
@@ -0,0 +1,440 @@
+"""
+Search Helpers
+
+This module implements the file search behind the search_files tool: walking
+directory trees for files matching a glob pattern and handing them to
+content_search for lines matching a regular expression.
+"""
+
+import fnmatch
+import glob
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import content_search
+import platform_fs
+
+try:
+    import vexy_glob
+except ImportError:
+    vexy_glob = None
+
+try:
+    import pathspec
+except ImportError:
+    pathspec = None
+
+logger = logging.getLogger(__name__)
+
+# Shared worker pool for directory traversal and batch tool calls.
+# Reason: threads overlap filesystem latency since the GIL is released during I/O,
+# and bounding the pool also bounds the number of open directory handles.
+executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="fs-search")
+
+# Maximum number of content scans queued ahead of the consumer
+_MAX_PENDING_SCANS = 1024
+
+# Directories searches never descend into unless the pattern names them explicitly
+# Override with a comma-separated list in MCP_PRUNE_DIRS (empty disables pruning)
+_DEFAULT_PRUNED = ".git,node_modules,__pycache__,.venv,target,.mypy_cache,.pytest_cache"
+PRUNED = frozenset(
+    name.strip() for name in os.getenv("MCP_PRUNE_DIRS", _DEFAULT_PRUNED).split(",") if name.strip()
+)
+
+# Glob components of the form '*.ext', which reduce to a suffix test
+_EXTENSION_GLOB = re.compile(r"\*\.[A-Za-z0-9_]+")
+
+# A glob component compiled by _compile_glob, or '**' for any number of directories
+PartMatcher = Union[str, Callable[[str], bool]]
+
+@lru_cache(maxsize=256)
+def _compile_glob(pattern: str, include_hidden: bool = False) -> Callable[[str], bool]:
+    """
+    Compile a single glob component into a name matcher.
+    
+    Behaves like fnmatch.fnmatchcase, but common shapes get a specialised test
+    so walking a tree does not run a regex for every entry: '*.ext' becomes a
+    suffix check and a component without wildcards a plain comparison. Like
+    glob, wildcards never match names starting with '.' unless hidden files
+    are included.
+    
+    Args:
+        pattern: The glob pattern for one path component
+        include_hidden: Whether wildcards may match names starting with '.'
+        
+    Returns:
+        A function taking a file or directory name and returning whether it matches
+    """
+    if not any(c in pattern for c in "*?["):
+        return pattern.__eq__
+    
+    skip_hidden = not include_hidden and not pattern.startswith('.')
+    if _EXTENSION_GLOB.fullmatch(pattern):
+        ext = pattern[1:]
+        if skip_hidden:
+            return lambda name: name.endswith(ext) and not name.startswith('.')
+        return lambda name: name.endswith(ext)
+    
+    match = re.compile(fnmatch.translate(pattern)).match
+    if skip_hidden:
+        return lambda name: not name.startswith('.') and match(name) is not None
+    return lambda name: match(name) is not None
+
+def _split_pattern(pattern: str) -> Optional[List[str]]:
+    """
+    Split a glob pattern into its path components.
+    
+    Args:
+        pattern: The glob pattern, optionally with '/'-separated subdirectories
+        
+    Returns:
+        The non-empty components, or None if the pattern is empty or ends with
+        a separator, which like glob only matches directories
+    """
+    pattern = pattern.replace(os.sep, "/")
+    if not pattern or pattern.endswith("/"):
+        return None
+    return [part for part in pattern.split("/") if part]
+
+def _match_parts(names: Sequence[str], matchers: Sequence[PartMatcher]) -> bool:
+    """
+    Match relative path components against compiled glob components, where
+    '**' spans zero or more directories.
+    
+    Args:
+        names: The path components relative to the search root
+        matchers: The glob pattern's components, compiled with _compile_glob
+        
+    Returns:
+        True if the whole path matches the pattern
+    """
+    if not matchers:
+        return not names
+    if matchers[0] == "**":
+        return any(_match_parts(names[i:], matchers[1:]) for i in range(len(names) + 1))
+    return bool(names) and matchers[0](names[0]) and _match_parts(names[1:], matchers[1:])
+
+def load_gitignore(root: str) -> Optional[Any]:
+    """
+    Load the .gitignore file at the top of a search root.
+    
+    Args:
+        root: The directory being searched
+        
+    Returns:
+        A pathspec.PathSpec of the ignore rules, or None if pathspec is not
+        installed or the root has no readable .gitignore
+    """
+    if pathspec is None:
+        return None
+    try:
+        with open(os.path.join(root, ".gitignore"), encoding="utf-8") as f:
+            # Reason: GitIgnoreSpec (pathspec 0.10+) follows git's precedence rules exactly
+            if hasattr(pathspec, "GitIgnoreSpec"):
+                return pathspec.GitIgnoreSpec.from_lines(f)
+            return pathspec.PathSpec.from_lines("gitwildmatch", f)
+    except (OSError, UnicodeDecodeError):
+        return None
+    except Exception as e:
+        logger.debug(f"Ignoring unparsable .gitignore in {root}: {e}")
+        return None
+
+def _is_pruned(names: Sequence[str], dir_parts: Sequence[str], ignore: Optional[Any]) -> bool:
+    """
+    Check whether a directory should be left out of a search.
+    
+    Args:
+        names: The directory's path components relative to the search root
+        dir_parts: The directory components of the glob pattern
+        ignore: The root's .gitignore rules, if any
+        
+    Returns:
+        True if the directory is pruned or ignored
+    """
+    name = names[-1]
+    # Reason: an explicit pattern such as 'node_modules/*/package.json' still reaches it
+    if name in PRUNED and name not in dir_parts:
+        return True
+    return ignore is not None and ignore.match_file("/".join(names) + "/")
+
+def _scan_dir(
+    dir_path: str,
+    rel: Tuple[str, ...],
+    parts: Sequence[str],
+    matchers: Sequence[PartMatcher],
+    recursive: bool,
+    include_hidden: bool,
+    ignore: Optional[Any],
+) -> Tuple[List[Tuple[str, Tuple[str, ...]]], List[Tuple[str, int]]]:
+    """
+    Scan a single directory for the search walker.
+    
+    Args:
+        dir_path: The directory to scan
+        rel: The directory's path components relative to the search root
+        parts: The glob pattern split into components
+        matchers: The same components compiled with _compile_glob
+        recursive: Whether the pattern may match at any depth
+        include_hidden: Whether to include hidden files and directories
+        ignore: The root's .gitignore rules, if any
+        
+    Returns:
+        A tuple of (subdirectories to descend into, matching (path, size) files)
+    """
+    subdirs = []
+    files = []
+    dir_parts = parts[:-1]
+    dir_matchers = [matcher for matcher in matchers[:-1] if matcher != "**"]
+    try:
+        entries = platform_fs.scandir(dir_path)
+    except OSError as e:
+        logger.debug(f"Skipping unreadable directory {dir_path}: {e}")
+        return subdirs, files
+    
+    with entries:
+        for entry in entries:
+            names = rel + (entry.name,)
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    # Reason: '**' does not descend into hidden directories
+                    descend = include_hidden or not entry.name.startswith('.') or any(
+                        match(entry.name) for match in dir_matchers
+                    )
+                else:
+                    descend = len(rel) < len(dir_matchers) and dir_matchers[len(rel)](entry.name)
+                if descend and not _is_pruned(names, dir_parts, ignore):
+                    subdirs.append((entry.path, names))
+            elif entry.is_file(follow_symlinks=False) and _match_parts(names, matchers):
+                if ignore is not None and ignore.match_file("/".join(names)):
+                    continue
+                # Reason: a file removed since the listing only drops that file
+                try:
+                    files.append((entry.path, entry.stat(follow_symlinks=False).st_size))
+                except OSError as e:
+                    logger.debug(f"Skipping vanished file {entry.path}: {e}")
+    return subdirs, files
+
+def walk(
+    root: str, pattern: str, recursive: bool, include_hidden: bool = False
+) -> Iterator[Tuple[str, int]]:
+    """
+    Find files below a directory matching a glob pattern.
+    
+    Equivalent to glob.glob(os.path.join(root, "**", pattern), recursive=True)
+    (or the non-recursive form), but driven by os.scandir so each entry's type
+    comes from the directory listing instead of a separate stat call (see
+    platform_fs.scandir for the bulk macOS variant). Directories
+    are scanned concurrently on the shared worker pool. Directories in PRUNED
+    and paths excluded by the root's .gitignore (when pathspec is installed)
+    are skipped.
+    
+    Args:
+        root: The directory to search in
+        pattern: The glob pattern, optionally with '/'-separated subdirectories
+        recursive: Whether to match the pattern at any depth below root
+        include_hidden: Whether to include hidden files and directories
+        
+    Yields:
+        (path, size) tuples for each matching regular file
+    """
+    parts = _split_pattern(pattern)
+    if parts is None:
+        return
+    if recursive:
+        parts = ["**"] + parts
+    else:
+        # Reason: without recursion glob treats '**' as an ordinary wildcard
+        parts = ["*" if part == "**" else part for part in parts]
+    if parts[-1] == "**":
+        # Reason: a trailing '**' matches file names like '*', hidden rule included
+        parts.append("*")
+    # Reason: compile the pattern once per search rather than per directory entry
+    matchers = [part if part == "**" else _compile_glob(part, include_hidden) for part in parts]
+    
+    ignore = load_gitignore(root)
+    scan_args = (parts, matchers, recursive, include_hidden, ignore)
+    pending = {executor.submit(_scan_dir, root, (), *scan_args)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            subdirs, files = future.result()
+            for dir_path, rel in subdirs:
+                pending.add(executor.submit(_scan_dir, dir_path, rel, *scan_args))
+            yield from files
+
+def _walk_vexy_glob(
+    root: str,
+    pattern: str,
+    recursive: bool,
+    include_hidden: bool,
+) -> Optional[Iterator[Tuple[str, int]]]:
+    """
+    Start a file listing with the vexy_glob Rust extension.
+    
+    vexy_glob walks and matches in parallel native code. Its options are
+    pinned to match the Python walker (case-sensitive, no symlinks, files below
+    PRUNED directories excluded), and results are filtered with the same name
+    matching and pruning since its globs let '*' cross directory separators.
+    Roots with a .gitignore use the Python walker when pathspec is installed,
+    as vexy_glob's ignore handling differs. Only paths are listed: file
+    contents are searched by content_search, as ripgrep's line splitting,
+    encoding handling and regex engine all differ from Python's.
+    
+    Args:
+        root: The directory to search in
+        pattern: The glob pattern to match filenames
+        recursive: Whether to search recursively in subdirectories
+        include_hidden: Whether to include hidden files and directories
+        
+    Returns:
+        An iterator of (path, size) tuples, or None if vexy_glob is not
+        installed, cannot handle this search or would not apply the root's
+        .gitignore
+    """
+    if vexy_glob is None:
+        return None
+    parts = _split_pattern(pattern)
+    # Reason: subdirectory patterns need the walker's per-component glob semantics
+    if parts is None or len(parts) != 1 or parts[0] == "**":
+        return None
+    name_pattern = parts[0]
+    
+    # Reason: vexy_glob's own .gitignore handling is not limited to the root's file, and
+    # the rules cannot be expressed as its exclude globs (e.g. negations)
+    ignore = load_gitignore(root)
+    if ignore is not None:
+        return None
+    
+    try:
+        hits = vexy_glob.find(
+            name_pattern,
+            root=root,
+            content=None,
+            file_type="f",
+            hidden=include_hidden or name_pattern.startswith('.'),
+            ignore_git=True,
+            case_sensitive=True,
+            follow_symlinks=False,
+            max_depth=None if recursive else 1,
+            # Reason: entries below pruned directories are never read
+            exclude=[f"**/{glob.escape(name)}/**" for name in sorted(PRUNED)] or None,
+        )
+    except Exception as e:
+        logger.debug(f"vexy_glob cannot handle this search, using the Python walker: {e}")
+        return None
+    
+    return _vexy_glob_files(hits, root, name_pattern, recursive, include_hidden)
+
+def _vexy_glob_files(
+    hits: Iterator[Any],
+    root: str,
+    name_pattern: str,
+    recursive: bool,
+    include_hidden: bool,
+) -> Iterator[Tuple[str, int]]:
+    """
+    Convert streamed vexy_glob paths into walk results.
+    
+    Args:
+        hits: The iterator returned by vexy_glob.find
+        root: The directory being searched
+        name_pattern: The glob pattern for file names
+        recursive: Whether the search is recursive
+        include_hidden: Whether to include hidden files and directories
+        
+    Yields:
+        (path, size) tuples, as for walk
+    """
+    match_name = _compile_glob(name_pattern, include_hidden)
+    for hit in hits:
+        path = str(hit)
+        names = os.path.relpath(path, root).split(os.sep)
+        if (not recursive and len(names) != 1) or not match_name(names[-1]):
+            continue
+        if not include_hidden and any(name.startswith('.') for name in names[:-1]):
+            continue
+        if any(_is_pruned(names[:i], (), None) for i in range(1, len(names))):
+            continue
+        try:
+            yield path, os.lstat(path).st_size
+        except OSError as e:
+            logger.debug(f"Skipping vanished file {path}: {e}")
+
+def search(
+    root: str,
+    pattern: str,
+    recursive: bool,
+    content_regex: Optional[str] = None,
+    include_hidden: bool = False,
+) -> Iterator[Tuple[str, int, Optional[List[Dict[str, Any]]]]]:
+    """
+    Find files matching a glob pattern, optionally containing lines matching a regex.
+    
+    Files are listed with vexy_glob when installed and able to handle the
+    search, and with the Python walker otherwise. Contents are always searched
+    with content_search.
+    
+    Args:
+        root: The directory to search in
+        pattern: The glob pattern to match filenames
+        recursive: Whether to search recursively in subdirectories
+        content_regex: Optional regex to search within file contents
+        include_hidden: Whether to include hidden files and directories
+        
+    Yields:
+        (path, size, matches) tuples. Without a content regex matches is None;
+        with one, only files containing matching lines are yielded
+        
+    Raises:
+        ValueError: If the content regex is invalid
+    """
+    # Reason: compile once per call (and cache across calls) instead of per file
+    content_re = content_search.compile_regex(content_regex) if content_regex else None
+    
+    files = _walk_vexy_glob(root, pattern, recursive, include_hidden)
+    if files is None:
+        files = walk(root, pattern, recursive, include_hidden)
+    
+    if content_re is None:
+        for file_path, size in files:
+            yield file_path, size, None
+        return
+    
+    lit = content_search.extract_required_literal(content_regex)
+    content_re_b = content_search.compile_bytes_regex(content_regex)
+    
+    # Reason: scan file contents on the I/O pool while the walk continues, keeping a
+    # bounded window of scans in flight so results stream out and memory stays flat
+    pending = deque()
+    for file_path, size in files:
+        future = content_search.executor.submit(
+            content_search.search_content, file_path, content_re, lit, content_re_b
+        )
+        pending.append((file_path, size, future))
+        if len(pending) >= _MAX_PENDING_SCANS:
+            yield from _finished_scan(*pending.popleft())
+    while pending:
+        yield from _finished_scan(*pending.popleft())
+
+def _finished_scan(
+    file_path: str, size: int, future: "Future[Optional[List[Dict[str, Any]]]]"
+) -> Iterator[Tuple[str, int, List[Dict[str, Any]]]]:
+    """
+    Wait for a content scan and yield its file if any lines matched.
+    
+    Args:
+        file_path: The scanned file
+        size: The file's size in bytes
+        future: The pending search_content call
+        
+    Yields:
+        A (path, size, matches) tuple if the file had matching lines
+    """
+    matches = future.result()
+    if matches:
+        yield file_path, size, matches
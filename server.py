@@ -7,15 +7,25 @@ It supports reading files, listing directories, searching files, and monitoring
 """
 
 import os
-import re
-import glob
 import logging
 import json
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Optional, Union, Any
+from typing import List, Dict, Optional, Union, Any, Callable, Iterator, Tuple
 
 from mcp.server.fastmcp import FastMCP, Context
 
+import path_utils
+import platform_fs
+import search_utils
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 log_level = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -30,32 +40,103 @@ mcp = FastMCP("Filesystem")
 
 # Security: Define a base directory to restrict access
 # Default to current directory if not specified
-BASE_DIR = os.getenv("MCP_BASE_DIR", os.getcwd())
+# Reason: resolve symlinks once so per-call checks compare against the real location
+BASE_DIR = os.path.realpath(os.getenv("MCP_BASE_DIR", os.getcwd()))
+# Trailing separator keeps e.g. /base from matching /base2
+_BASE_SEP = os.path.join(BASE_DIR, "")
 logger.info(f"Base directory set to: {BASE_DIR}")
 
+# Performance: Let list_directory use cached file sizes on network filesystems (Linux only)
+STAT_DONT_SYNC = os.getenv("MCP_STAT_DONT_SYNC", "0") == "1"
+
+# Short-lived cache of os.path.isdir/isfile results, keyed by (kind, path)
+_STAT_CACHE_TTL = 1.0
+_STAT_CACHE_MAX = 4096
+_stat_cache: Dict[Tuple[str, str], Tuple[float, bool]] = {}
+
+# Short-lived cache of secure_path results, keyed by (path, base)
+_secure_path_cache: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
 def secure_path(path: str) -> str:
     """
     Ensure the path is within the allowed base directory to prevent directory traversal attacks.
     
+    Symlinks are resolved before the check, so a link inside the base directory
+    cannot be used to reach files outside it.
+    
     Args:
         path: The requested file or directory path
         
     Returns:
-        The absolute path, restricted to the base directory
+        The resolved absolute path, restricted to the base directory
     """
-    # Convert to absolute path
-    if not os.path.isabs(path):
-        path = os.path.join(BASE_DIR, path)
+    # Reason: clients tend to request the same paths repeatedly, but symlinks can
+    # change, so results are only reused briefly. BASE_DIR is part of the key.
+    key = (path, BASE_DIR)
+    now = time.monotonic()
+    cached = _secure_path_cache.get(key)
+    if cached is not None and now - cached[0] < _STAT_CACHE_TTL:
+        return cached[1]
     
-    # Normalize to resolve any '..' components
-    normalized_path = os.path.normpath(path)
+    resolved = path_utils.resolve_within(path, BASE_DIR, _BASE_SEP)
+    if len(_secure_path_cache) >= _STAT_CACHE_MAX:
+        _secure_path_cache.clear()
+    _secure_path_cache[key] = (now, resolved)
+    return resolved
+
+def _cached_check(kind: str, path: str) -> bool:
+    """
+    Check whether a path is a directory or file, reusing results for a short time.
     
-    # Ensure the path is within the base directory
-    if not normalized_path.startswith(BASE_DIR):
-        logger.warning(f"Attempted access outside base directory: {path}")
-        raise ValueError(f"Access denied: Path must be within {BASE_DIR}")
+    Args:
+        kind: Either "dir" or "file"
+        path: The path to check
+        
+    Returns:
+        The result of os.path.isdir or os.path.isfile
+    """
+    key = (kind, path)
+    now = time.monotonic()
+    cached = _stat_cache.get(key)
+    if cached is not None and now - cached[0] < _STAT_CACHE_TTL:
+        return cached[1]
     
-    return normalized_path
+    result = os.path.isdir(path) if kind == "dir" else os.path.isfile(path)
+    if len(_stat_cache) >= _STAT_CACHE_MAX:
+        _stat_cache.clear()
+    _stat_cache[key] = (now, result)
+    return result
+
+def _invalidate_stat_cache(path: str) -> None:
+    """
+    Drop any cached isdir/isfile results for a path after it changed.
+    
+    Args:
+        path: The absolute path that changed
+    """
+    _stat_cache.pop(("dir", path), None)
+    _stat_cache.pop(("file", path), None)
+
+def _run_batch(func: Callable[..., Any], paths: List[str], *args: Any) -> Dict[str, Any]:
+    """
+    Run a single-path tool for several paths concurrently.
+    
+    Paths that resolve to the same location are only processed once.
+    
+    Args:
+        func: The tool function, called as func(path, *args)
+        paths: The requested paths
+        *args: Extra arguments passed to every call
+        
+    Returns:
+        A dictionary mapping each requested path to its result
+    """
+    resolved = {path: secure_path(path) for path in paths}
+    futures = {}
+    for path, target in resolved.items():
+        if target not in futures:
+            futures[target] = search_utils.executor.submit(func, path, *args)
+    return {path: futures[target].result() for path, target in resolved.items()}
 
 @mcp.tool()
 def read_file(path: str, ctx: Context) -> str:
@@ -80,13 +161,12 @@ def read_file(path: str, ctx: Context) -> str:
         secure_file_path = secure_path(path)
         
         # Check if file exists
-        if not os.path.isfile(secure_file_path):
+        if not _cached_check("file", secure_file_path):
             logger.error(f"File does not exist: {secure_file_path}")
             raise ValueError(f"File does not exist: {path}")
         
         # Read file content
-        with open(secure_file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        content = platform_fs.read_text(secure_file_path)
         
         logger.debug(f"Successfully read file at path: {path}")
         return content
@@ -95,6 +175,32 @@ def read_file(path: str, ctx: Context) -> str:
         logger.error(f"Error reading file at path: {path} - {e}")
         raise ValueError(f"Failed to read file: {str(e)}")
 
+@mcp.tool()
+def read_files(paths: List[str], ctx: Context) -> Dict[str, str]:
+    """
+    Read and return the contents of several files.
+    
+    This tool reads multiple files concurrently, saving a round trip per file.
+    Paths can be absolute or relative to the base directory.
+    
+    Args:
+        paths: The paths to the files to read
+        ctx: The MCP context
+        
+    Returns:
+        A dictionary mapping each requested path to the file's contents
+        
+    Raises:
+        ValueError: If any file does not exist or cannot be read
+    """
+    logger.debug(f"Attempting to read {len(paths)} files")
+    try:
+        return _run_batch(read_file, paths, ctx)
+    
+    except Exception as e:
+        logger.error(f"Error reading files: {e}")
+        raise ValueError(f"Failed to read files: {str(e)}")
+
 @mcp.tool()
 def list_directory(path: str, include_hidden: bool = False) -> List[Dict[str, Any]]:
     """
@@ -122,31 +228,42 @@ def list_directory(path: str, include_hidden: bool = False) -> List[Dict[str, An
         secure_dir_path = secure_path(path)
         
         # Check if directory exists
-        if not os.path.isdir(secure_dir_path):
+        if not _cached_check("dir", secure_dir_path):
             logger.error(f"Directory does not exist: {secure_dir_path}")
             raise ValueError(f"Directory does not exist: {path}")
         
         # List directory contents
+        # Reason: scandir entries carry the file type, saving a stat call per entry
+        # (on macOS, sizes are fetched in bulk as well)
         items = []
-        for item in os.listdir(secure_dir_path):
-            # Skip hidden files if not included
-            if not include_hidden and item.startswith('.'):
-                continue
-                
-            item_path = os.path.join(secure_dir_path, item)
-            is_dir = os.path.isdir(item_path)
-            
-            item_info = {
-                "name": item,
-                "type": "directory" if is_dir else "file",
-                "is_hidden": item.startswith('.')
-            }
-            
-            # Add size for files
-            if not is_dir:
-                item_info["size"] = os.path.getsize(item_path)
-                
-            items.append(item_info)
+        # Reason: a cached statx avoids an NFS revalidation round trip per file
+        dir_fd = None
+        if STAT_DONT_SYNC and platform_fs.has_fast_stat():
+            dir_fd = os.open(secure_dir_path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            with platform_fs.scandir(secure_dir_path) as entries:
+                for entry in entries:
+                    # Skip hidden files if not included
+                    if not include_hidden and entry.name.startswith('.'):
+                        continue
+                        
+                    is_dir = entry.is_dir()
+                    
+                    item_info = {
+                        "name": entry.name,
+                        "type": "directory" if is_dir else "file",
+                        "is_hidden": entry.name.startswith('.')
+                    }
+                    
+                    # Add size for files
+                    if not is_dir:
+                        st = platform_fs.fast_stat(dir_fd, entry.name) if dir_fd is not None else None
+                        item_info["size"] = (st or entry.stat()).st_size
+                        
+                    items.append(item_info)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
         
         logger.debug(f"Successfully listed directory at path: {path}")
         return items
@@ -155,24 +272,86 @@ def list_directory(path: str, include_hidden: bool = False) -> List[Dict[str, An
         logger.error(f"Error listing directory at path: {path} - {e}")
         raise ValueError(f"Failed to list directory: {str(e)}")
 
+@mcp.tool()
+def list_directories(paths: List[str], include_hidden: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    List the contents of several directories.
+    
+    This tool lists multiple directories concurrently, saving a round trip per
+    directory. Paths can be absolute or relative to the base directory.
+    
+    Args:
+        paths: The paths to the directories to list
+        include_hidden: Whether to include hidden files (starting with '.')
+        
+    Returns:
+        A dictionary mapping each requested path to its listing, in the same
+        format as list_directory
+        
+    Raises:
+        ValueError: If any directory does not exist or cannot be accessed
+    """
+    logger.debug(f"Attempting to list {len(paths)} directories")
+    try:
+        return _run_batch(list_directory, paths, include_hidden)
+    
+    except Exception as e:
+        logger.error(f"Error listing directories: {e}")
+        raise ValueError(f"Failed to list directories: {str(e)}")
+
+def _search_files_iter(
+    secure_search_path: str,
+    pattern: str,
+    recursive: bool,
+    content_regex: Optional[str],
+    include_hidden: bool
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily produce search_files results as the search finds them.
+    
+    Args:
+        secure_search_path: The validated directory to search in
+        pattern: The glob pattern to match filenames
+        recursive: Whether to search recursively in subdirectories
+        content_regex: Optional regex pattern to search within file contents
+        include_hidden: Whether to include hidden files and directories
+        
+    Yields:
+        A result dictionary for each matching file, as returned by search_files
+    """
+    for file_path, size, matches in search_utils.search(
+        secure_search_path, pattern, recursive, content_regex, include_hidden
+    ):
+        result = {
+            "path": os.path.relpath(file_path, BASE_DIR),
+            "size": size
+        }
+        if matches is not None:
+            result["matches"] = matches
+        yield result
+
 @mcp.tool()
 def search_files(
     pattern: str, 
     search_path: str = ".", 
     recursive: bool = True, 
-    content_regex: Optional[str] = None
+    content_regex: Optional[str] = None,
+    include_hidden: bool = False
 ) -> List[Dict[str, Any]]:
     """
     Search for files matching a pattern and optionally containing specific content.
     
     This tool searches for files matching a glob pattern and optionally containing 
-    text matching a regular expression.
+    text matching a regular expression. Dependency, cache and VCS directories
+    (e.g. .git, node_modules) and paths ignored by the search directory's
+    .gitignore are skipped.
     
     Args:
         pattern: The glob pattern to match filenames (e.g., "*.py", "data/*.csv")
         search_path: The directory to search in (default: current directory)
         recursive: Whether to search recursively in subdirectories
         content_regex: Optional regex pattern to search within file contents
+        include_hidden: Whether to include hidden files and directories (default: False)
         
     Returns:
         A list of dictionaries containing information about matching files:
@@ -188,49 +367,17 @@ def search_files(
         secure_search_path = secure_path(search_path)
         
         # Check if search path exists
-        if not os.path.isdir(secure_search_path):
+        if not _cached_check("dir", secure_search_path):
             logger.error(f"Search path does not exist: {secure_search_path}")
             raise ValueError(f"Search path does not exist: {search_path}")
         
-        # Prepare the glob pattern
-        if recursive:
-            search_pattern = os.path.join(secure_search_path, "**", pattern)
-        else:
-            search_pattern = os.path.join(secure_search_path, pattern)
-        
         # Find matching files
-        matching_files = []
-        for file_path in glob.glob(search_pattern, recursive=recursive):
-            if os.path.isfile(file_path):
-                result = {
-                    "path": os.path.relpath(file_path, BASE_DIR),
-                    "size": os.path.getsize(file_path)
-                }
-                
-                # If content regex is provided, search within the file
-                if content_regex:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # Find all matches in the content
-                        regex = re.compile(content_regex)
-                        matches = []
-                        
-                        for i, line in enumerate(content.splitlines()):
-                            if regex.search(line):
-                                matches.append({
-                                    "line_number": i + 1,
-                                    "content": line.strip()
-                                })
-                        
-                        if matches:
-                            result["matches"] = matches
-                            matching_files.append(result)
-                    except Exception as e:
-                        logger.warning(f"Could not search content in {file_path}: {e}")
-                else:
-                    matching_files.append(result)
+        # Reason: the walk finishes directories in thread-completion order, so sort
+        # to give clients the same response for the same tree every time
+        matching_files = sorted(
+            _search_files_iter(secure_search_path, pattern, recursive, content_regex, include_hidden),
+            key=lambda result: result["path"]
+        )
         
         logger.debug(f"Found {len(matching_files)} matching files")
         return matching_files
@@ -239,30 +386,76 @@ def search_files(
         logger.error(f"Error searching files: {e}")
         raise ValueError(f"Failed to search files: {str(e)}")
 
+def _dumps(obj: Any) -> str:
+    """
+    Serialize an object to a JSON string, using orjson when installed.
+    
+    Args:
+        obj: The object to serialize
+        
+    Returns:
+        The JSON string
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
 # Optional: File monitoring resource
 try:
     from watchdog.observers import Observer
     from watchdog.events import FileSystemEventHandler
     
-    # Store file changes
-    file_changes = []
+    # Store the latest change per file, keeping only the last 100 files
+    _MAX_FILE_CHANGES = 100
+    file_changes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    # Events for the same file within this many seconds are collapsed into one change
+    _DEBOUNCE_SECONDS = 0.1
+    _last_seen: Dict[str, float] = {}
+    
+    # Reason: events arrive on the observer thread while resources are read on the server's
+    _file_changes_lock = threading.Lock()
+    
+    # Events that do not change a file (newer watchdog versions report opens and closes,
+    # including those from this server's own reads)
+    _IGNORED_EVENT_TYPES = {"opened", "closed", "closed_no_write"}
     
     class ChangeHandler(FileSystemEventHandler):
         def on_any_event(self, event):
+            if event.event_type in _IGNORED_EVENT_TYPES:
+                return
+            
+            _invalidate_stat_cache(event.src_path)
+            if getattr(event, "dest_path", None):
+                _invalidate_stat_cache(event.dest_path)
+            
             if event.is_directory:
                 return
             
+            path = event.src_path
+            now = time.monotonic()
+            with _file_changes_lock:
+                last = _last_seen.get(path, 0.0)
+                _last_seen[path] = now
+                # Reason: editors save with create/modify bursts, so keep the entry
+                # already recorded and skip the filesystem checks. Any other event
+                # within the burst replaces it, so its time matches its type
+                if (path in file_changes and now - last < _DEBOUNCE_SECONDS
+                        and event.event_type == "modified"):
+                    return
+            
             # Record the change
             change = {
-                "path": os.path.relpath(event.src_path, BASE_DIR),
+                "path": os.path.relpath(path, BASE_DIR),
                 "type": event.event_type,
-                "time": os.path.getmtime(event.src_path) if os.path.exists(event.src_path) else None
+                "time": os.path.getmtime(path) if os.path.exists(path) else None
             }
-            file_changes.append(change)
-            
-            # Keep only the last 100 changes
-            if len(file_changes) > 100:
-                file_changes.pop(0)
+            with _file_changes_lock:
+                file_changes[path] = change
+                file_changes.move_to_end(path)
+                while len(file_changes) > _MAX_FILE_CHANGES:
+                    evicted, _ = file_changes.popitem(last=False)
+                    _last_seen.pop(evicted, None)
     
     # Set up the observer
     event_handler = ChangeHandler()
@@ -277,12 +470,14 @@ try:
         Get a list of recent file changes.
         
         This resource returns information about recent file changes that have been
-        monitored by the server.
+        monitored by the server, with the latest change for each file.
         
         Returns:
             A JSON string containing recent file changes
         """
-        return json.dumps(file_changes)
+        with _file_changes_lock:
+            changes = list(file_changes.values())
+        return _dumps(changes)
     
 except ImportError:
     logger.info("File monitoring disabled (watchdog not installed)")
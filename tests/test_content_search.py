@@ -0,0 +1,137 @@
+import re
+
+import pytest
+
+import content_search
+
+# Patterns that take each route through search_content: a required literal
+# (mapped), a bytes-safe regex (mapped), and neither (line by line)
+PATTERNS = ["foo", "fo+", r"\d|foo"]
+
+
+def search(path, pattern):
+    """Run search_content the way search_utils.search does."""
+    return content_search.search_content(
+        str(path),
+        content_search.compile_regex(pattern),
+        content_search.extract_required_literal(pattern),
+        content_search.compile_bytes_regex(pattern),
+    )
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_search_content_finds_matching_lines(tmp_path, pattern):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"first\n  foo bar  \nlast foo")
+    assert search(path, pattern) == [
+        {"line_number": 2, "content": "foo bar"},
+        {"line_number": 3, "content": "last foo"},
+    ]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_search_content_crlf_line_endings(tmp_path, pattern):
+    path = tmp_path / "crlf.txt"
+    path.write_bytes(b"one\r\nfoo bar\r\nthree\r\n")
+    assert search(path, pattern) == [{"line_number": 2, "content": "foo bar"}]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_search_content_lone_cr_line_endings(tmp_path, pattern):
+    path = tmp_path / "cr.txt"
+    path.write_bytes(b"line\rfoo old mac\rline\n")
+    assert search(path, pattern) == [{"line_number": 2, "content": "foo old mac"}]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_search_content_skips_invalid_utf8(tmp_path, pattern):
+    path = tmp_path / "bad.txt"
+    path.write_bytes(b"foo\n\xff\xfe\n")
+    assert search(path, pattern) is None
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_search_content_empty_file(tmp_path, pattern):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    assert search(path, pattern) == []
+
+
+def test_search_content_missing_file(tmp_path):
+    assert search(tmp_path / "missing.txt", "foo") is None
+
+
+def test_search_content_without_numpy(tmp_path, monkeypatch):
+    monkeypatch.setattr(content_search, "np", None)
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"foo\nbar\nfoo\r\nbaz foo")
+    assert [m["line_number"] for m in search(path, "foo")] == [1, 3, 4]
+
+
+@pytest.mark.parametrize("pattern, literal", [
+    ("def foo", "def foo"),
+    ("ab+c", "a"),
+    (r"foo\d+bar", "foo"),
+    ("(?i)foo", None),
+    ("a|b", None),
+    ("[ab]c", "c"),
+])
+def test_extract_required_literal(pattern, literal):
+    assert content_search.extract_required_literal(pattern) == literal
+
+
+@pytest.mark.parametrize("pattern, safe", [
+    ("foo", True),
+    ("^def [a-z_]+", True),
+    ("(foo|bar)+", True),
+    ("foo.", False),
+    (r"\w+", False),
+    ("[^a]", False),
+    ("foo$", False),
+    ("(?i)foo", False),
+    ("café", False),
+])
+def test_compile_bytes_regex(pattern, safe):
+    assert (content_search.compile_bytes_regex(pattern) is not None) == safe
+
+
+def test_compile_regex_invalid():
+    with pytest.raises(ValueError):
+        content_search.compile_regex("(")
+
+
+@pytest.mark.parametrize("pattern, compatible", [
+    ("foo", True),
+    ("^def [a-z_]+", True),
+    ("a{2,3}b", True),
+    ("(?i)foo", True),
+    ("a{,3}b", False),
+    ("[[:alpha:]]", False),
+    (r"\s+", False),
+    (r"[\d.]+", False),
+    (r"(x|\w)+", False),
+    (r"\bfoo", False),
+    (r"\pL", False),
+    ("(", False),
+])
+def test_is_re2_compatible(pattern, compatible):
+    assert content_search._is_re2_compatible(pattern) == compatible
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+@pytest.mark.parametrize("pattern, line", [
+    ("a{,3}b", "xaab"),
+    ("[[:alpha:]]", ":]"),
+    (r"\s", "a\vb"),
+    (r"\d", "٣"),
+])
+def test_compile_regex_keeps_python_semantics(tmp_path, pattern, line):
+    path = tmp_path / "a.txt"
+    path.write_text(line + "\n", encoding="utf-8")
+    assert search(path, pattern) == [{"line_number": 1, "content": line.strip()}]
+
+
+def test_compile_regex_uses_re2_when_compatible():
+    pytest.importorskip("re2")
+    assert not isinstance(content_search.compile_regex("foo"), re.Pattern)
+    assert isinstance(content_search.compile_regex("a{,3}b"), re.Pattern)
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+import path_utils
+
+
+@pytest.fixture
+def base(tmp_path):
+    """A resolved base directory with a sibling and a symlinked alias."""
+    real = tmp_path / "base"
+    (real / "src").mkdir(parents=True)
+    (tmp_path / "base2").mkdir()
+    (tmp_path / "alias").symlink_to(real)
+    resolved = os.path.realpath(real)
+    return tmp_path, resolved, os.path.join(resolved, "")
+
+
+def test_resolve_within_relative_and_aliased_paths(base):
+    tmp_path, resolved, base_sep = base
+    assert path_utils.resolve_within(".", resolved, base_sep) == resolved
+    assert path_utils.resolve_within("src/a.py", resolved, base_sep) == os.path.join(resolved, "src", "a.py")
+    aliased = str(tmp_path / "alias" / "src" / "a.py")
+    assert path_utils.resolve_within(aliased, resolved, base_sep) == os.path.join(resolved, "src", "a.py")
+
+
+@pytest.mark.parametrize("path", ["..", "../base2", "src/../../base2/x", "/"])
+def test_resolve_within_rejects_outside_paths(base, path):
+    _, resolved, base_sep = base
+    with pytest.raises(ValueError):
+        path_utils.resolve_within(path, resolved, base_sep)
+
+
+def test_resolve_within_rejects_escaping_symlinks(base):
+    tmp_path, resolved, base_sep = base
+    os.symlink(tmp_path / "base2", os.path.join(resolved, "out"))
+    with pytest.raises(ValueError):
+        path_utils.resolve_within("out/x", resolved, base_sep)
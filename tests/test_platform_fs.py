@@ -0,0 +1,102 @@
+import ctypes
+import os
+import stat
+import struct
+
+import pytest
+
+import platform_fs
+
+VREG = 1
+VDIR = 2
+VLNK = 5
+
+
+def pack_record(name, obj_type, mtime, size=None, error=None):
+    """Pack one getattrlistbulk(2) record the way the macOS kernel lays it out."""
+    common = (
+        platform_fs.ATTR_CMN_RETURNED_ATTRS
+        | platform_fs.ATTR_CMN_NAME
+        | platform_fs.ATTR_CMN_OBJTYPE
+        | platform_fs.ATTR_CMN_MODTIME
+    )
+    fileattr = 0
+    before_name = b""
+    if error is not None:
+        common |= platform_fs.ATTR_CMN_ERROR
+        before_name = struct.pack("=I", error)
+    after_name = struct.pack("=I", obj_type) + struct.pack("=qq", mtime, 123)
+    if size is not None:
+        fileattr = platform_fs.ATTR_FILE_TOTALSIZE
+        after_name += struct.pack("=q", size)
+    name_bytes = os.fsencode(name) + b"\0"
+    # Reason: the name offset is relative to the attrreference_t itself
+    name_ref = struct.pack("=iI", 8 + len(after_name), len(name_bytes))
+    body = (
+        struct.pack("=5I", common, 0, 0, fileattr, 0)
+        + before_name + name_ref + after_name + name_bytes
+    )
+    body += b"\0" * (-(len(body) + 4) % 8)
+    return struct.pack("=I", len(body) + 4) + body
+
+
+def test_parse_entries_decodes_records():
+    buf = (
+        pack_record("a.txt", VREG, 1_700_000_000, size=42)
+        + pack_record("sub", VDIR, 1_600_000_000)
+        + pack_record("link", VLNK, 5, size=3)
+        + pack_record("café", VREG, 7, size=0)
+    )
+    entries = platform_fs._parse_entries(buf, 4, "/d")
+    assert [entry.name for entry in entries] == ["a.txt", "sub", "link", "café"]
+    assert [entry.path for entry in entries] == ["/d/a.txt", "/d/sub", "/d/link", "/d/café"]
+
+    a, sub, link, cafe = entries
+    assert a.is_file(follow_symlinks=False) and not a.is_dir(follow_symlinks=False)
+    assert a.stat(follow_symlinks=False).st_size == 42
+    assert a.stat(follow_symlinks=False).st_mtime == 1_700_000_000
+    assert sub.is_dir(follow_symlinks=False)
+    assert sub.stat(follow_symlinks=False).st_size == 0
+    assert link.is_symlink() and stat.S_ISLNK(link.stat(follow_symlinks=False).st_mode)
+    assert cafe.stat(follow_symlinks=False).st_mtime == 7
+
+
+def test_parse_entries_skips_errors():
+    buf = (
+        pack_record("bad", VREG, 1, size=1, error=13)
+        + pack_record("good", VREG, 2, size=2)
+    )
+    entries = platform_fs._parse_entries(buf, 2, "/d")
+    assert [(entry.name, entry.stat(follow_symlinks=False).st_size) for entry in entries] == [("good", 2)]
+
+
+def test_parse_entries_from_ctypes_buffer():
+    record = pack_record("x", VREG, 1, size=9)
+    buf = ctypes.create_string_buffer(record, 4096)
+    entries = platform_fs._parse_entries(buf, 1, "/d")
+    assert [(entry.name, entry.stat(follow_symlinks=False).st_size) for entry in entries] == [("x", 9)]
+
+
+@pytest.mark.skipif(not platform_fs.has_fast_stat(), reason="statx(2) is not available")
+def test_fast_stat_matches_stat(tmp_path):
+    (tmp_path / "file.txt").write_bytes(b"x" * 1234)
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "link").symlink_to(tmp_path / "file.txt")
+    (tmp_path / "dir_link").symlink_to(tmp_path / "dir")
+    dir_fd = os.open(tmp_path, os.O_RDONLY)
+    try:
+        for name in ("file.txt", "dir", "link", "dir_link"):
+            expected = os.stat(name, dir_fd=dir_fd)
+            result = platform_fs.fast_stat(dir_fd, name)
+            assert result.st_mode == expected.st_mode
+            assert result.st_size == expected.st_size
+        with pytest.raises(FileNotFoundError):
+            platform_fs.fast_stat(dir_fd, "missing")
+    finally:
+        os.close(dir_fd)
+
+
+def test_read_text_translates_newlines(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"a\r\nb\rc\n")
+    assert platform_fs.read_text(str(path)) == "a\nb\nc\n"
@@ -0,0 +1,224 @@
+import fnmatch
+import glob
+import os
+import types
+
+import pytest
+
+import search_utils
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small tree with a hidden directory and a subdirectory."""
+    for rel, text in {
+        "a.py": "one\nfoo = 1\n",
+        "notes.txt": "foo\n",
+        "sub/c.py": "foo\n",
+        ".hid/b.py": "foo\n",
+    }.items():
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_vexy(monkeypatch):
+    """Replace vexy_glob with a stub returning preset hits."""
+    calls = []
+    stub = types.SimpleNamespace(hits=[], calls=calls)
+    
+    def find(pattern, **kwargs):
+        calls.append((pattern, kwargs))
+        return iter(stub.hits)
+    
+    stub.find = find
+    monkeypatch.setattr(search_utils, "vexy_glob", stub)
+    return stub
+
+
+def relative(results, root):
+    return sorted((os.path.relpath(path, root), size, matches) for path, size, matches in results)
+
+
+def test_vexy_glob_lists_paths_for_content_search(tree, fake_vexy):
+    (tree / "bad.py").write_bytes(b"foo\xff\n")
+    (tree / "mac.py").write_bytes(b"one\rfoo\r")
+    fake_vexy.hits = [
+        str(tree / "a.py"),
+        str(tree / "bad.py"),
+        str(tree / "mac.py"),
+        str(tree / "notes.txt"),
+        str(tree / "sub" / "c.py"),
+        str(tree / ".hid" / "b.py"),
+    ]
+    results = relative(search_utils.search(str(tree), "*.py", True, "fo+"), tree)
+    # Contents are searched in Python, so invalid UTF-8 is skipped and a lone '\r' ends a line
+    assert results == [
+        ("a.py", 12, [{"line_number": 2, "content": "foo = 1"}]),
+        ("mac.py", 8, [{"line_number": 2, "content": "foo"}]),
+        (os.path.join("sub", "c.py"), 4, [{"line_number": 1, "content": "foo"}]),
+    ]
+    pattern, kwargs = fake_vexy.calls[0]
+    assert pattern == "*.py"
+    assert kwargs["content"] is None
+    assert kwargs["hidden"] is False
+    assert kwargs["max_depth"] is None
+
+
+def test_vexy_glob_paths_non_recursive_with_hidden(tree, fake_vexy):
+    fake_vexy.hits = [
+        str(tree / "a.py"),
+        str(tree / "sub" / "c.py"),
+        str(tree / ".hid" / "b.py"),
+    ]
+    results = relative(search_utils.search(str(tree), "*.py", False, include_hidden=True), tree)
+    assert results == [("a.py", 12, None)]
+    _, kwargs = fake_vexy.calls[0]
+    assert kwargs["hidden"] is True
+    assert kwargs["max_depth"] == 1
+
+
+def test_vexy_glob_error_falls_back_to_walker(tree, fake_vexy):
+    def find(pattern, **kwargs):
+        raise RuntimeError("walk failed")
+    
+    fake_vexy.find = find
+    results = relative(search_utils.search(str(tree), "*.py", True, "fo+"), tree)
+    assert [path for path, _, _ in results] == ["a.py", os.path.join("sub", "c.py")]
+
+
+def test_vexy_glob_skips_subdirectory_patterns(tree, fake_vexy):
+    results = relative(search_utils.search(str(tree), "sub/*.py", True), tree)
+    assert results == [(os.path.join("sub", "c.py"), 4, None)]
+    assert not fake_vexy.calls
+
+
+def test_vexy_glob_excludes_pruned_directories(tree, fake_vexy):
+    (tree / "node_modules").mkdir()
+    (tree / "node_modules" / "d.py").write_text("foo\n")
+    fake_vexy.hits = [str(tree / "a.py"), str(tree / "node_modules" / "d.py")]
+    results = relative(search_utils.search(str(tree), "*.py", True), tree)
+    assert results == [("a.py", 12, None)]
+    _, kwargs = fake_vexy.calls[0]
+    assert "**/node_modules/**" in kwargs["exclude"]
+
+
+def test_vexy_glob_skipped_for_gitignored_roots(tree, fake_vexy):
+    pytest.importorskip("pathspec")
+    (tree / ".gitignore").write_text("sub/\n")
+    results = relative(search_utils.search(str(tree), "*.py", True), tree)
+    assert results == [("a.py", 12, None)]
+    assert not fake_vexy.calls
+
+
+def test_walk_prunes_directories(tree):
+    (tree / "node_modules" / "pkg").mkdir(parents=True)
+    (tree / "node_modules" / "pkg" / "d.py").write_text("foo\n")
+    assert relative(search_utils.search(str(tree), "*.py", True), tree) == [
+        ("a.py", 12, None),
+        (os.path.join("sub", "c.py"), 4, None),
+    ]
+    # Naming a pruned directory in the pattern still reaches it
+    assert relative(search_utils.search(str(tree), "node_modules/*/*.py", False), tree) == [
+        (os.path.join("node_modules", "pkg", "d.py"), 4, None),
+    ]
+
+
+def test_walk_applies_root_gitignore(tree):
+    pytest.importorskip("pathspec")
+    (tree / ".gitignore").write_text("sub/\n*.txt\n")
+    assert relative(search_utils.search(str(tree), "*", True), tree) == [("a.py", 12, None)]
+
+
+def test_walk_include_hidden(tree):
+    results = relative(search_utils.search(str(tree), "*.py", True, include_hidden=True), tree)
+    assert [path for path, _, _ in results] == [
+        os.path.join(".hid", "b.py"), "a.py", os.path.join("sub", "c.py"),
+    ]
+
+
+NAMES = [
+    "a.py", ".py", ".a.py", "x.pyc", "py", "b.PY", "foo", ".foo",
+    "a[b].py", "ab", "a.b.c", "x_1.txt", "é.py",
+]
+PATTERNS = [
+    "*.py", "*", ".*", "foo", ".foo", "a?", "*.txt", "[ab]*", "*.PY",
+    "a*.py", "?", "*_1.*", ".py", "[!a]*", "*.b.c", "*.p[yz]",
+]
+
+
+@pytest.mark.parametrize("include_hidden", [False, True])
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_compile_glob_matches_fnmatchcase(pattern, include_hidden):
+    match = search_utils._compile_glob(pattern, include_hidden)
+    for name in NAMES:
+        hidden = name.startswith(".") and not include_hidden and not pattern.startswith(".")
+        expected = not hidden and fnmatch.fnmatchcase(name, pattern)
+        assert bool(match(name)) == expected, name
+
+
+@pytest.fixture
+def glob_tree(tmp_path):
+    """A tree of files for comparing the walker with glob.glob."""
+    for rel in [
+        "a.py", "b.txt", ".hidden.py", "test_a.py",
+        "pkg/__init__.py", "pkg/mod.py", "pkg/test_mod.py", "pkg/data.csv",
+        "pkg/sub/deep.py", "pkg/sub/.secret.py",
+        ".cfg/settings.py", "docs/index.md", "docs/test_docs.txt",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x\n")
+    (tmp_path / "link.py").symlink_to(tmp_path / "a.py")
+    return tmp_path
+
+
+@pytest.mark.parametrize("pattern, recursive", [
+    ("*.py", True),
+    ("*", True),
+    ("test_*", True),
+    ("sub/*.py", True),
+    ("*/__init__.py", False),
+    ("[a-c]*.py", False),
+    ("pkg/**", False),
+    ("*.md", True),
+    ("**", True),
+    ("**", False),
+    ("", True),
+    ("pkg/", True),
+    ("*/", False),
+])
+def test_walk_matches_glob(glob_tree, pattern, recursive):
+    root = str(glob_tree)
+    if recursive:
+        expected = glob.glob(os.path.join(root, "**", pattern), recursive=True)
+    else:
+        expected = glob.glob(os.path.join(root, pattern))
+    # glob reports some paths twice for '**/**'
+    expected = sorted({p for p in expected if os.path.isfile(p) and not os.path.islink(p)})
+    assert sorted(path for path, _ in search_utils.walk(root, pattern, recursive)) == expected
+
+
+def test_walk_skips_files_vanishing_mid_scan(tmp_path, monkeypatch):
+    for name in ("a.py", "b.py", "c.py"):
+        (tmp_path / name).write_text("x\n")
+    scandir = search_utils.platform_fs.scandir
+    
+    class Listing(list):
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc_info):
+            pass
+    
+    def vanishing_scandir(path):
+        with scandir(path) as it:
+            entries = Listing(sorted(it, key=lambda entry: entry.name))
+        (tmp_path / "b.py").unlink(missing_ok=True)
+        return entries
+    
+    monkeypatch.setattr(search_utils.platform_fs, "scandir", vanishing_scandir)
+    paths = sorted(path for path, _ in search_utils.walk(str(tmp_path), "*.py", True))
+    assert paths == [str(tmp_path / "a.py"), str(tmp_path / "c.py")]
@@ -0,0 +1,197 @@
+import os
+
+import pytest
+
+pytest.importorskip("mcp")
+
+import server
+
+
+@pytest.fixture
+def change_handler(monkeypatch):
+    """A ChangeHandler recording into an empty change history."""
+    events = pytest.importorskip("watchdog.events")
+    monkeypatch.setattr(server, "file_changes", server.OrderedDict())
+    monkeypatch.setattr(server, "_last_seen", {})
+    return server.ChangeHandler(), events
+
+
+def test_change_handler_ignores_opens_and_closes(change_handler, tmp_path):
+    handler, events = change_handler
+    path = str(tmp_path / "a.txt")
+    for event_class in ("FileOpenedEvent", "FileClosedNoWriteEvent", "FileClosedEvent"):
+        if hasattr(events, event_class):
+            handler.on_any_event(getattr(events, event_class)(path))
+    assert not server.file_changes
+
+
+def test_change_handler_keeps_creation_within_burst(change_handler, tmp_path):
+    handler, events = change_handler
+    path = str(tmp_path / "a.txt")
+    handler.on_any_event(events.FileCreatedEvent(path))
+    handler.on_any_event(events.FileModifiedEvent(path))
+    handler.on_any_event(events.FileModifiedEvent(path))
+    assert [change["type"] for change in server.file_changes.values()] == ["created"]
+
+
+def test_change_handler_records_deletion_within_burst(change_handler, tmp_path):
+    handler, events = change_handler
+    path = tmp_path / "a.txt"
+    path.write_text("x")
+    handler.on_any_event(events.FileCreatedEvent(str(path)))
+    path.unlink()
+    handler.on_any_event(events.FileDeletedEvent(str(path)))
+    assert [(change["type"], change["time"]) for change in server.file_changes.values()] == [
+        ("deleted", None)
+    ]
+
+
+def test_change_handler_records_creation_after_deletion_within_burst(change_handler, tmp_path):
+    handler, events = change_handler
+    path = tmp_path / "a.txt"
+    handler.on_any_event(events.FileDeletedEvent(str(path)))
+    path.write_text("x")
+    handler.on_any_event(events.FileCreatedEvent(str(path)))
+    assert [(change["type"], change["time"]) for change in server.file_changes.values()] == [
+        ("created", os.path.getmtime(path))
+    ]
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    """Point the server at a fresh base directory, reached through a symlink."""
+    real = tmp_path / "base"
+    (real / "src").mkdir(parents=True)
+    (real / "src" / "a.py").write_text("foo\n")
+    (tmp_path / "base2").mkdir()
+    link = tmp_path / "baselink"
+    link.symlink_to(real)
+    resolved = os.path.realpath(real)
+    monkeypatch.setattr(server, "BASE_DIR", resolved)
+    monkeypatch.setattr(server, "_BASE_SEP", os.path.join(resolved, ""))
+    monkeypatch.setattr(server, "_secure_path_cache", {})
+    monkeypatch.setattr(server, "_stat_cache", {})
+    return tmp_path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the server's monotonic clock with one advanced by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_secure_path_cache_expires(base_dir, clock):
+    root = base_dir / "base"
+    (root / "other").mkdir()
+    (root / "lnk").symlink_to(root / "src")
+    first = server.secure_path("lnk/a.py")
+    assert first == os.path.join(os.path.realpath(root), "src", "a.py")
+    (root / "lnk").unlink()
+    (root / "lnk").symlink_to(root / "other")
+    clock[0] += server._STAT_CACHE_TTL / 2
+    assert server.secure_path("lnk/a.py") == first
+    clock[0] += server._STAT_CACHE_TTL
+    assert server.secure_path("lnk/a.py") == os.path.join(os.path.realpath(root), "other", "a.py")
+
+
+def test_secure_path_cache_keyed_by_base(base_dir, monkeypatch):
+    assert server.secure_path("src") == os.path.join(os.path.realpath(base_dir / "base"), "src")
+    other = os.path.realpath(base_dir / "base2")
+    monkeypatch.setattr(server, "BASE_DIR", other)
+    monkeypatch.setattr(server, "_BASE_SEP", os.path.join(other, ""))
+    assert server.secure_path("src") == os.path.join(other, "src")
+
+
+def test_cached_check_expires_and_is_invalidated(base_dir, clock, change_handler):
+    handler, events = change_handler
+    path = base_dir / "base" / "src" / "a.py"
+    assert server._cached_check("file", str(path))
+    path.unlink()
+    assert server._cached_check("file", str(path))
+    clock[0] += server._STAT_CACHE_TTL
+    assert not server._cached_check("file", str(path))
+    
+    path.write_text("foo\n")
+    clock[0] += server._STAT_CACHE_TTL / 2
+    assert not server._cached_check("file", str(path))
+    handler.on_any_event(events.FileCreatedEvent(str(path)))
+    assert server._cached_check("file", str(path))
+
+
+def test_secure_path_accepts_paths_inside_base(base_dir):
+    resolved = os.path.realpath(base_dir / "base")
+    assert server.secure_path(".") == resolved
+    assert server.secure_path("src/a.py") == os.path.join(resolved, "src", "a.py")
+    # The unresolved spelling of the base maps onto the resolved one
+    assert server.secure_path(str(base_dir / "baselink" / "src" / "a.py")) == os.path.join(
+        resolved, "src", "a.py"
+    )
+
+
+@pytest.mark.parametrize("path", ["..", "../base2", "src/../../base2/x"])
+def test_secure_path_rejects_paths_outside_base(base_dir, path):
+    with pytest.raises(ValueError):
+        server.secure_path(path)
+
+
+def test_secure_path_rejects_symlinks_leaving_base(base_dir):
+    (base_dir / "base" / "out_link").symlink_to(base_dir / "base2")
+    with pytest.raises(ValueError):
+        server.secure_path("out_link/x")
+
+
+def test_search_files_sorted_by_path(base_dir):
+    root = base_dir / "base"
+    for rel in ["z.py", "b/y.py", "a/x.py", "a/b/w.py", "m.py"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("foo\n")
+    paths = [result["path"] for result in server.search_files("*.py")]
+    assert paths == sorted(paths)
+    assert len(paths) == 6
+
+
+def test_list_directory_follows_symlinks(base_dir):
+    root = base_dir / "base"
+    (root / "data.txt").write_text("0123456789")
+    (root / "dir_link").symlink_to(root / "src")
+    (root / "file_link").symlink_to(root / "data.txt")
+    items = {item["name"]: item for item in server.list_directory(".")}
+    assert items["dir_link"]["type"] == "directory"
+    assert "size" not in items["dir_link"]
+    assert items["file_link"] == {"name": "file_link", "type": "file", "size": 10, "is_hidden": False}
+
+
+def test_read_files_keyed_by_requested_path(base_dir):
+    resolved = os.path.realpath(base_dir / "base")
+    (base_dir / "base" / "src" / "b.py").write_text("bar\n")
+    paths = ["src/a.py", os.path.join(resolved, "src", "b.py"), "./src/a.py"]
+    assert server.read_files(paths, None) == {
+        "src/a.py": "foo\n",
+        os.path.join(resolved, "src", "b.py"): "bar\n",
+        "./src/a.py": "foo\n",
+    }
+
+
+def test_list_directories_lists_aliases_once(base_dir, monkeypatch):
+    (base_dir / "base" / "src_link").symlink_to(base_dir / "base" / "src")
+    calls = []
+    list_directory = server.list_directory
+    
+    def counting_list_directory(path, include_hidden=False):
+        calls.append(path)
+        return list_directory(path, include_hidden)
+    
+    monkeypatch.setattr(server, "list_directory", counting_list_directory)
+    listings = server.list_directories(["src", "src_link"])
+    assert listings["src"] == listings["src_link"] == [
+        {"name": "a.py", "type": "file", "size": 4, "is_hidden": False}
+    ]
+    assert len(calls) == 1
+
+
+def test_list_directories_fails_on_missing_path(base_dir):
+    with pytest.raises(ValueError, match="missing"):
+        server.list_directories(["src", "missing"])